@@ -2,6 +2,7 @@ import logging
 import requests
 import pandas as pd
 from config import OKX_BASE_URL
+from bot.profiling import span
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +27,10 @@ def get_ohlcv(symbol, interval="15m", limit=100):
     }
     
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        with span("http"):
+            response = requests.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
         
         if data.get("code") != "0":
             logger.error(f"OKX API error for {symbol}: {data.get('msg')}")
@@ -38,26 +40,27 @@ def get_ohlcv(symbol, interval="15m", limit=100):
             logger.warning(f"No data returned for {symbol}")
             return None
             
-        # Create DataFrame from API response
-        # OKX API returns: [timestamp, open, high, low, close, volume, volumeCcy, volumeCcyQuote, confirm]
-        df = pd.DataFrame(
-            data["data"], 
-            columns=["timestamp", "open", "high", "low", "close", "volume", "volumeCcy", "volumeCcyQuote", "confirm"]
-        )
+        with span("parse"):
+            # Create DataFrame from API response
+            # OKX API returns: [timestamp, open, high, low, close, volume, volumeCcy, volumeCcyQuote, confirm]
+            df = pd.DataFrame(
+                data["data"], 
+                columns=["timestamp", "open", "high", "low", "close", "volume", "volumeCcy", "volumeCcyQuote", "confirm"]
+            )
         
-        # Keep only the columns we need
-        df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+            # Keep only the columns we need
+            df = df[["timestamp", "open", "high", "low", "close", "volume"]]
         
-        # Convert price and volume columns to float
-        numeric_columns = ["open", "high", "low", "close", "volume"]
-        for col in numeric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            # Convert price and volume columns to float
+            numeric_columns = ["open", "high", "low", "close", "volume"]
+            for col in numeric_columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        # Convert timestamp to datetime
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit='ms')
+            # Convert timestamp to datetime
+            df["timestamp"] = pd.to_datetime(df["timestamp"], unit='ms')
         
-        # Sort by timestamp (oldest first)
-        df = df.sort_values('timestamp').reset_index(drop=True)
+            # Sort by timestamp (oldest first)
+            df = df.sort_values('timestamp').reset_index(drop=True)
         
         logger.info(f"Successfully fetched {len(df)} candles for {symbol}")
         return df
@@ -5,14 +5,20 @@ Simplified Telegram Trading Bot for Replit environment
 import logging
 import asyncio
 import os
+import time
 from telegram.ext import ApplicationBuilder, CommandHandler
 from bot.handlers import (
-    start, show_coins, add_coin, remove_coin, set_interval, 
-    send_signal, user_settings
+    start, show_coins, add_coin, remove_coin, set_interval, profile,
+    send_signal, send_digest, user_settings, load_user_settings
 )
 from bot.api import get_ohlcv
-from bot.signals import check_signal
-from config import BOT_TOKEN, MONITOR_SLEEP_SECONDS
+from bot.signals import check_signal, format_signal_message
+from bot.profiling import tick_trace, span, install_signal_handlers
+from bot.scheduler import MarketScheduler
+from bot.signal_log import signal_log
+from config import (
+    BOT_TOKEN, DEFAULT_INTERVAL, MONITOR_SLEEP_SECONDS, TICK_TIME_BUDGET_SECONDS, DIGEST_MODE
+)
 
 # Configure logging
 logging.basicConfig(
@@ -21,8 +27,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Orders (symbol, interval) work across ticks
+scheduler = MarketScheduler()
+
+async def deliver_pending(app):
+    """Send every chat the signal events past its cursor"""
+    # Each event is rendered once per tick, however many chats receive it
+    rendered = {}
+    
+    for chat_id, settings in list(user_settings.items()):
+        interval = settings.get("interval", DEFAULT_INTERVAL)
+        markets = {(symbol, interval) for symbol in settings.get("coins", [])}
+        events = signal_log.pending(chat_id, markets)
+        
+        if DIGEST_MODE and events:
+            bodies = []
+            for event in events:
+                if event["seq"] not in rendered:
+                    rendered[event["seq"]] = format_signal_message(
+                        event["symbol"], event["interval"], event["signal"]
+                    )
+                bodies.append(rendered[event["seq"]])
+            sent = await send_digest(app, chat_id, bodies)
+            if sent < len(events):
+                # Keep the cursor before the first undelivered event so it is retried next tick
+                signal_log.acknowledge(chat_id, events[:sent])
+                signal_log.advance(chat_id, events[sent]["seq"] - 1)
+                continue
+        else:
+            for event in events:
+                await send_signal(app, chat_id, event["symbol"], event["interval"], event["signal"])
+                logger.info(f"New {event['signal']} signal for {event['symbol']} sent to user {chat_id}")
+        signal_log.acknowledge(chat_id, events)
+        signal_log.advance(chat_id, signal_log.head)
+    
+    signal_log.save_cursors()
+
 async def monitor_signals_simple(app):
-    """Simplified signal monitoring loop"""
+    """Simplified signal monitoring loop, one evaluation per market in priority order"""
     logger.info("Starting signal monitoring loop")
     
     while True:
@@ -31,29 +73,36 @@ async def monitor_signals_simple(app):
                 await asyncio.sleep(MONITOR_SLEEP_SECONDS)
                 continue
                 
-            for chat_id, settings in list(user_settings.items()):
-                coins = settings.get("coins", [])
-                interval = settings.get("interval", "15m")
+            with tick_trace():
+                tick_started = time.monotonic()
+                work = scheduler.plan(user_settings)
                 
-                for symbol in coins:
+                for index, market in enumerate(work):
+                    # Defer low-priority markets instead of running the whole tick late
+                    if index and time.monotonic() - tick_started > TICK_TIME_BUDGET_SECONDS:
+                        logger.warning(f"Tick budget exceeded, deferred {len(work) - index} of {len(work)} markets")
+                        break
+                    
+                    symbol, interval = market.symbol, market.interval
                     try:
-                        df = get_ohlcv(symbol, interval)
+                        with span("fetch"):
+                            df = get_ohlcv(symbol, interval)
                         if df is None:
+                            # Stay stale so the market keeps its priority and is retried
                             continue
+                        scheduler.mark_evaluated(symbol, interval)
                         
-                        signal = check_signal(df)
-                        if signal is None:
-                            continue
-                        
-                        last_signal = settings["last_signals"].get(symbol)
-                        if signal != last_signal:
-                            await send_signal(app, chat_id, symbol, interval, signal)
-                            settings["last_signals"][symbol] = signal
-                            logger.info(f"New {signal} signal for {symbol} sent to user {chat_id}")
+                        with span("analyze"):
+                            signal = check_signal(df, symbol, interval)
+                        if signal is not None:
+                            signal_log.record(symbol, interval, signal)
                         
                     except Exception as e:
-                        logger.error(f"Error processing {symbol} for user {chat_id}: {e}")
+                        logger.error(f"Error processing {symbol} {interval}: {e}")
                         continue
+                
+                with span("send"):
+                    await deliver_pending(app)
             
             await asyncio.sleep(MONITOR_SLEEP_SECONDS)
             
@@ -76,11 +125,16 @@ def main():
     app.add_handler(CommandHandler("add", add_coin))
     app.add_handler(CommandHandler("remove", remove_coin))
     app.add_handler(CommandHandler("timeframe", set_interval))
+    app.add_handler(CommandHandler("profile", profile))
     
+    signal_log.load()
+    load_user_settings()
     logger.info("Bot handlers registered successfully")
     
     # Start monitoring in background
     async def run_bot():
+        install_signal_handlers(asyncio.get_running_loop())
+        
         # Start monitoring task
         monitor_task = asyncio.create_task(monitor_signals_simple(app))
         
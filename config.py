@@ -12,6 +12,12 @@ DEFAULT_INTERVAL = "15m"
 ALLOWED_INTERVALS = ["1m", "5m", "15m"]
 MONITOR_SLEEP_SECONDS = 60
 
+# Scheduling configuration
+TICK_TIME_BUDGET_SECONDS = 45
+SCHEDULER_SUBSCRIBER_WEIGHT = 1.0
+SCHEDULER_STALENESS_WEIGHT = 2.0
+SCHEDULER_BAR_CLOSE_WEIGHT = 4.0
+
 # Technical analysis parameters
 EMA_SHORT = 8
 EMA_LONG = 21
@@ -20,3 +26,24 @@ MACD_FAST = 12
 MACD_SLOW = 26
 MACD_SIGNAL = 9
 MIN_CANDLES = 30
+INDICATOR_CACHE_MAX_MARKETS = 500
+
+# Storage configuration
+USER_SETTINGS_PATH = os.getenv("USER_SETTINGS_PATH", "user_settings.json")
+
+# Signal state configuration
+SIGNAL_LOG_PATH = os.getenv("SIGNAL_LOG_PATH", "signal_events.jsonl")
+SIGNAL_CURSORS_PATH = os.getenv("SIGNAL_CURSORS_PATH", "signal_cursors.json")
+SIGNAL_LOG_MAX_EVENTS = 10000
+
+# Notification configuration
+DIGEST_MODE = os.getenv("DIGEST_MODE", "1") == "1"
+DIGEST_MAX_CHARS = 4000     # Telegram rejects messages over 4096 characters
+DIGEST_MAX_EVENTS = 20
+
+# Profiling configuration
+ADMIN_CHAT_IDS = [int(x) for x in os.getenv("ADMIN_CHAT_IDS", "").split(",") if x.strip()]
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SLOWEST_TICKS = 20
+PROFILE_TICK_WINDOW = 60         # Recent ticks considered by the slow tick dump
+PROFILE_SAMPLE_INTERVAL = 0.005
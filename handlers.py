@@ -1,21 +1,59 @@
+import os
+import json
 import logging
 from telegram import Update
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
 from telegram.ext import ContextTypes
-from config import DEFAULT_COINS, DEFAULT_INTERVAL, ALLOWED_INTERVALS
+from config import (
+    DEFAULT_COINS, DEFAULT_INTERVAL, ALLOWED_INTERVALS, ADMIN_CHAT_IDS, USER_SETTINGS_PATH
+)
+from bot.profiling import dump_slow_ticks, toggle_sampler
+from bot.signal_log import signal_log
 
 logger = logging.getLogger(__name__)
 
-# In-memory storage for user settings
+# In-memory storage for user settings, snapshotted to USER_SETTINGS_PATH
 user_settings = {}
 
+def load_user_settings():
+    """Restore user settings saved by save_user_settings."""
+    if not os.path.exists(USER_SETTINGS_PATH):
+        return
+    
+    try:
+        with open(USER_SETTINGS_PATH) as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load user settings from {USER_SETTINGS_PATH}: {e}")
+        return
+    
+    for chat_id, settings in saved.items():
+        user_settings[int(chat_id)] = {
+            "coins": settings.get("coins", DEFAULT_COINS.copy()),
+            "interval": settings.get("interval", DEFAULT_INTERVAL)
+        }
+    logger.info(f"Loaded settings for {len(saved)} users")
+
+def save_user_settings():
+    """Snapshot user settings to disk."""
+    tmp_path = USER_SETTINGS_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(user_settings, f, ensure_ascii=False)
+        os.replace(tmp_path, USER_SETTINGS_PATH)
+    except OSError as e:
+        logger.error(f"Failed to save user settings: {e}")
+
 def get_user_settings(chat_id):
     """Get or create user settings."""
     if chat_id not in user_settings:
         user_settings[chat_id] = {
             "coins": DEFAULT_COINS.copy(),
-            "interval": DEFAULT_INTERVAL,
-            "last_signals": {}
+            "interval": DEFAULT_INTERVAL
         }
+        signal_log.track(chat_id)
+        signal_log.subscribe(chat_id, {(symbol, DEFAULT_INTERVAL) for symbol in DEFAULT_COINS})
+        save_user_settings()
     return user_settings[chat_id]
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -77,6 +115,8 @@ async def add_coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"⚠️ Монета {symbol} уже в списке отслеживания.")
     else:
         settings["coins"].append(symbol)
+        signal_log.subscribe(chat_id, {(symbol, settings["interval"])})
+        save_user_settings()
         await update.message.reply_text(
             f"✅ Монета {symbol} добавлена в список отслеживания.\n\n"
             f"Всего монет: {len(settings['coins'])}"
@@ -102,8 +142,7 @@ async def remove_coin(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"⚠️ Монеты {symbol} нет в списке отслеживания.")
     else:
         settings["coins"].remove(symbol)
-        # Clear last signal for removed coin
-        settings["last_signals"].pop(symbol, None)
+        save_user_settings()
         await update.message.reply_text(
             f"✅ Монета {symbol} удалена из списка отслеживания.\n\n"
             f"Осталось монет: {len(settings['coins'])}"
@@ -135,16 +174,43 @@ async def set_interval(update: Update, context: ContextTypes.DEFAULT_TYPE):
     settings = get_user_settings(chat_id)
     old_interval = settings["interval"]
     settings["interval"] = interval
+    signal_log.subscribe(chat_id, {(symbol, interval) for symbol in settings["coins"]})
+    save_user_settings()
     
-    # Clear last signals when changing timeframe
-    settings["last_signals"].clear()
-    
-    await update.message.reply_text(
-        f"✅ Таймфрейм изменён с {old_interval} на {interval}\n\n"
-        "История сигналов очищена для корректной работы с новым таймфреймом."
-    )
+    await update.message.reply_text(f"✅ Таймфрейм изменён с {old_interval} на {interval}")
     logger.info(f"User {chat_id} changed interval from {old_interval} to {interval}")
 
+async def profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /profile command - admin-only profiling controls."""
+    chat_id = update.effective_chat.id
+    
+    if chat_id not in ADMIN_CHAT_IDS:
+        logger.warning(f"User {chat_id} tried to use /profile without admin rights")
+        return
+    
+    action = context.args[0].lower() if context.args else "ticks"
+    
+    if action == "ticks":
+        path = dump_slow_ticks()
+        message = f"🐢 Самые медленные тики сохранены: {path}" if path else "Тики ещё не записаны."
+    elif action == "sample":
+        running, path = toggle_sampler()
+        if running:
+            message = "▶️ Сэмплер запущен. Повтори /profile sample чтобы остановить."
+        elif path:
+            message = f"⏹ Сэмплер остановлен, профиль сохранён: {path}"
+        else:
+            message = "⏹ Сэмплер остановлен, сэмплов нет."
+    else:
+        message = (
+            "Правильный формат: /profile [ticks|sample]\n"
+            "ticks - сохранить самые медленные тики\n"
+            "sample - включить/выключить сэмплер"
+        )
+    
+    await update.message.reply_text(message)
+    logger.info(f"Admin {chat_id} ran /profile {action}")
+
 async def send_signal(app, chat_id, symbol, interval, signal):
     """Send trading signal to user."""
     try:
@@ -154,3 +220,39 @@ async def send_signal(app, chat_id, symbol, interval, signal):
         logger.info(f"Sent {signal} signal for {symbol} to user {chat_id}")
     except Exception as e:
         logger.error(f"Failed to send signal to user {chat_id}: {e}")
+
+async def send_digest(app, chat_id, bodies):
+    """
+    Send pre-rendered signal messages to user, merged into digests.
+    
+    Sending stops at the first digest hitting a flood limit (RetryAfter) or a
+    network error, so the remaining signals are retried on the next tick in
+    order. A timeout counts as delivered: Telegram may already have accepted
+    the message, and a lost signal is better than one repeated every tick.
+    Any other error (bot blocked, bad request, chat migrated, ...) will not
+    succeed on retry, so that digest is logged and skipped.
+    
+    Returns:
+        int: Number of leading bodies that were delivered or skipped
+    """
+    from bot.signals import chunk_digest_bodies, render_digest
+    done = 0
+    for chunk in chunk_digest_bodies(bodies):
+        try:
+            await app.bot.send_message(chat_id=chat_id, text=render_digest(chunk))
+        except RetryAfter as e:
+            logger.warning(f"Flood limit for user {chat_id}, deferring {len(bodies) - done} signals ({e.retry_after}s)")
+            break
+        except TimedOut as e:
+            logger.warning(f"Timed out sending signal digest to user {chat_id}, assuming delivered: {e}")
+        except BadRequest as e:
+            logger.error(f"Telegram rejected signal digest for user {chat_id}: {e}")
+        except NetworkError as e:
+            logger.warning(f"Network error sending signal digest to user {chat_id}, retrying next tick: {e}")
+            break
+        except Exception as e:
+            logger.error(f"Failed to send signal digest to user {chat_id}: {e}")
+        done += len(chunk)
+    
+    logger.info(f"Sent {done} of {len(bodies)} signals to user {chat_id}")
+    return done
@@ -0,0 +1,237 @@
+import os
+import sys
+import time
+import heapq
+import signal
+import logging
+import threading
+import contextvars
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from config import PROFILE_DIR, PROFILE_SLOWEST_TICKS, PROFILE_TICK_WINDOW, PROFILE_SAMPLE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Trace of the monitor tick currently running in this task (None outside a tick)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+class TickTrace:
+    """
+    Per-stage timings for one monitor tick.
+
+    Spans are stored as collapsed stacks ("tick;fetch;http") mapped to
+    self time in seconds, so child stages are not double counted.
+    """
+
+    def __init__(self, tick_id):
+        self.tick_id = tick_id
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.spans = Counter()
+        self._stack = []
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        path = ";".join(frame[0] for frame in self._stack)
+        name, started, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.spans[path] += elapsed - child_time
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        return elapsed
+
+class SlowTickBuffer:
+    """
+    Rolling window of recent tick traces.
+
+    Only the last `window` ticks are kept, so old slowdowns (e.g. at startup
+    or during an OKX outage) age out and a later, milder one still shows up.
+    """
+
+    def __init__(self, size=PROFILE_SLOWEST_TICKS, window=PROFILE_TICK_WINDOW):
+        self.size = size
+        self._traces = deque(maxlen=window)
+
+    def add(self, trace):
+        self._traces.append(trace)
+
+    def slowest(self):
+        """Return the N slowest traces of the window, slowest first."""
+        return heapq.nlargest(self.size, self._traces, key=lambda trace: trace.duration)
+
+class StackSampler:
+    """
+    Statistical profiler that periodically samples the stack of one thread.
+
+    Samples are aggregated as collapsed stacks, which is the input format
+    of flamegraph.pl, inferno and speedscope.
+    """
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._target_id = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id=None):
+        if self.running:
+            return
+        self._target_id = thread_id or threading.main_thread().ident
+        self.samples = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"Stack sampler started ({self.interval * 1000:.1f} ms interval)")
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Stack sampler stopped ({sum(self.samples.values())} samples)")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                stack.append(f"{module}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+slow_ticks = SlowTickBuffer()
+sampler = StackSampler()
+_tick_counter = 0
+
+@contextmanager
+def tick_trace():
+    """Trace one monitor tick and record it in the slow tick buffer."""
+    global _tick_counter
+    _tick_counter += 1
+    trace = TickTrace(_tick_counter)
+    token = _current_trace.set(trace)
+    trace.enter("tick")
+    try:
+        yield trace
+    finally:
+        trace.duration = trace.exit()
+        _current_trace.reset(token)
+        slow_ticks.add(trace)
+        logger.debug(f"Tick {trace.tick_id} took {trace.duration:.3f}s")
+
+@contextmanager
+def span(name):
+    """Time a stage of the current tick. No-op outside of tick_trace()."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    trace.enter(name)
+    try:
+        yield
+    finally:
+        trace.exit()
+
+def _profile_path(prefix):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(PROFILE_DIR, f"{prefix}-{stamp}.folded")
+
+def dump_slow_ticks():
+    """
+    Write the slowest ticks to disk as collapsed stacks (values in microseconds).
+
+    Returns:
+        str: Path of the written file
+        None: If no ticks have been recorded yet or the file could not be written
+    """
+    traces = slow_ticks.slowest()
+    if not traces:
+        return None
+
+    try:
+        path = _profile_path("ticks")
+        with open(path, "w") as f:
+            for trace in traces:
+                root = f"tick#{trace.tick_id} {trace.started_at:%H:%M:%S} {trace.duration:.3f}s"
+                for stack, seconds in trace.spans.items():
+                    f.write(f"{root};{stack} {int(seconds * 1_000_000)}\n")
+    except OSError as e:
+        logger.error(f"Failed to dump slow ticks to {PROFILE_DIR}: {e}")
+        return None
+    logger.info(f"Dumped {len(traces)} slowest ticks to {path}")
+    return path
+
+def dump_samples():
+    """
+    Write the sampler's collected stacks to disk.
+
+    Returns:
+        str: Path of the written file
+        None: If nothing has been sampled or the file could not be written
+    """
+    if not sampler.samples:
+        return None
+
+    try:
+        path = _profile_path("samples")
+        with open(path, "w") as f:
+            for stack, count in sampler.samples.most_common():
+                f.write(f"{stack} {count}\n")
+    except OSError as e:
+        logger.error(f"Failed to dump stack samples to {PROFILE_DIR}: {e}")
+        return None
+    logger.info(f"Dumped {sum(sampler.samples.values())} stack samples to {path}")
+    return path
+
+def toggle_sampler():
+    """
+    Start the sampler, or stop it and dump the collected samples.
+
+    Returns:
+        tuple: (running, path) - new sampler state and dump path if stopped
+    """
+    if sampler.running:
+        sampler.stop()
+        return False, dump_samples()
+    sampler.start()
+    return True, None
+
+def install_signal_handlers(loop):
+    """
+    Bind profiling to POSIX signals on the event loop:
+    - SIGUSR1: dump the slowest tick traces
+    - SIGUSR2: toggle the stack sampler
+
+    Handlers run as regular loop callbacks, so they never interrupt a tick.
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        logger.warning("Profiling signals are not supported on this platform")
+        return
+
+    try:
+        loop.add_signal_handler(signal.SIGUSR1, _run_signal_action, dump_slow_ticks)
+        loop.add_signal_handler(signal.SIGUSR2, _run_signal_action, toggle_sampler)
+    except (NotImplementedError, RuntimeError) as e:
+        logger.warning(f"Could not install profiling signals: {e}")
+        return
+    logger.info(f"Profiling signals installed (SIGUSR1: dump ticks, SIGUSR2: toggle sampler, pid {os.getpid()})")
+
+def _run_signal_action(action):
+    try:
+        action()
+    except Exception as e:
+        logger.error(f"Profiling signal handler failed: {e}")
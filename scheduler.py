@@ -0,0 +1,86 @@
+import math
+import time
+import logging
+from collections import namedtuple
+from config import (
+    DEFAULT_INTERVAL, SCHEDULER_SUBSCRIBER_WEIGHT, SCHEDULER_STALENESS_WEIGHT,
+    SCHEDULER_BAR_CLOSE_WEIGHT
+)
+
+logger = logging.getLogger(__name__)
+
+# One unit of monitor work: evaluate a market and notify its subscribers
+MarketWork = namedtuple("MarketWork", ["symbol", "interval", "chat_ids", "score"])
+
+_INTERVAL_UNITS = {"m": 60, "H": 3600, "D": 86400}
+
+def interval_seconds(interval):
+    """Convert an OKX bar size (1m, 15m, 1H, ...) to seconds."""
+    try:
+        return int(interval[:-1]) * _INTERVAL_UNITS[interval[-1]]
+    except (KeyError, ValueError):
+        logger.warning(f"Unknown interval {interval}, assuming 1m")
+        return 60
+
+class MarketScheduler:
+    """
+    Orders (symbol, interval) work by priority.
+    
+    Priority grows with:
+    - subscriber count (logarithmic, so huge markets don't starve the rest)
+    - time since the last evaluation, in bars (deferred work keeps rising)
+    - a bar having closed since the last evaluation
+    """
+
+    def __init__(self):
+        # {(symbol, interval): unix time of last evaluation}
+        self.last_evaluated = {}
+
+    def score(self, symbol, interval, subscribers, now):
+        bar = interval_seconds(interval)
+        last = self.last_evaluated.get((symbol, interval))
+        if last is None:
+            staleness = 1.0
+            bar_closed = True
+        else:
+            staleness = (now - last) / bar
+            bar_closed = now // bar > last // bar
+        
+        return (
+            SCHEDULER_SUBSCRIBER_WEIGHT * math.log2(1 + subscribers)
+            + SCHEDULER_STALENESS_WEIGHT * staleness
+            + (SCHEDULER_BAR_CLOSE_WEIGHT if bar_closed else 0.0)
+        )
+
+    def plan(self, user_settings, now=None):
+        """
+        Build this tick's work list, highest priority first.
+        
+        Args:
+            user_settings (dict): {chat_id: settings} as kept by handlers
+            now (float, optional): Unix time, defaults to time.time()
+            
+        Returns:
+            list: MarketWork items sorted by descending score
+        """
+        now = time.time() if now is None else now
+        subscribers = {}
+        for chat_id, settings in list(user_settings.items()):
+            interval = settings.get("interval", DEFAULT_INTERVAL)
+            for symbol in settings.get("coins", []):
+                subscribers.setdefault((symbol, interval), []).append(chat_id)
+        
+        # Forget markets nobody watches any more
+        for market in list(self.last_evaluated):
+            if market not in subscribers:
+                del self.last_evaluated[market]
+        
+        work = [
+            MarketWork(symbol, interval, chat_ids, self.score(symbol, interval, len(chat_ids), now))
+            for (symbol, interval), chat_ids in subscribers.items()
+        ]
+        work.sort(key=lambda item: item.score, reverse=True)
+        return work
+
+    def mark_evaluated(self, symbol, interval, now=None):
+        self.last_evaluated[(symbol, interval)] = time.time() if now is None else now
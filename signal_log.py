@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import logging
+from collections import deque
+from config import SIGNAL_LOG_PATH, SIGNAL_CURSORS_PATH, SIGNAL_LOG_MAX_EVENTS
+
+logger = logging.getLogger(__name__)
+
+class SignalLog:
+    """
+    Append-only log of signal transitions, one authoritative state per market.
+    
+    Each (symbol, interval) keeps its last event; a new event is appended only
+    when the signal changes. Chats hold a cursor (the seq of the last event they
+    have seen), so delivery is a scan of the log tail instead of a per-chat copy
+    of every market's state.
+    
+    Events are appended to a JSON lines file and cursors are snapshotted to a
+    small JSON file, so a restarted bot resumes where each chat left off. The
+    events file is compacted to the market states plus the in-memory horizon
+    on load and whenever it grows past twice the horizon.
+    """
+
+    def __init__(self, path=SIGNAL_LOG_PATH, cursors_path=SIGNAL_CURSORS_PATH,
+                 max_events=SIGNAL_LOG_MAX_EVENTS):
+        self.path = path
+        self.cursors_path = cursors_path
+        # Replay horizon kept in memory
+        self.events = deque(maxlen=max_events)
+        # {(symbol, interval): last event}
+        self.state = {}
+        # {chat_id: seq of the last event delivered}
+        self.cursors = {}
+        # {chat_id: {(symbol, interval)}} newly watched markets whose current
+        # state the chat should receive (in memory only)
+        self.replays = {}
+        self.head = 0
+        self._cursors_dirty = False
+        # Number of event lines currently in the file, including dropped ones
+        self._file_lines = 0
+
+    def load(self):
+        """
+        Rebuild market state and chat cursors from disk.
+        
+        Unreadable lines (e.g. a write torn by a crash) are skipped, cursors
+        are clamped to the loaded head, and the events file is compacted.
+        """
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    for line_number, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        self._file_lines += 1
+                        try:
+                            self._apply(json.loads(line))
+                        except (ValueError, KeyError, TypeError) as e:
+                            logger.warning(f"Skipping bad signal event at {self.path}:{line_number}: {e}")
+            except OSError as e:
+                logger.error(f"Failed to read signal events from {self.path}: {e}")
+        
+        if os.path.exists(self.cursors_path):
+            try:
+                with open(self.cursors_path) as f:
+                    cursors = {int(chat_id): seq for chat_id, seq in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read chat cursors from {self.cursors_path}: {e}")
+                cursors = {}
+            
+            # A lost or rotated events file restarts seq numbering; cursors past
+            # the head would otherwise hide every new event from their chats
+            self.cursors = {chat_id: min(seq, self.head) for chat_id, seq in cursors.items()}
+            self._cursors_dirty = self.cursors != cursors
+        
+        self.compact()
+        logger.info(f"Loaded {self.head} signal events and {len(self.cursors)} chat cursors")
+
+    def _apply(self, event):
+        market = (event["symbol"], event["interval"])
+        if event["seq"] <= self.head:
+            raise ValueError(f"event #{event['seq']} is out of order")
+        self.events.append(event)
+        self.state[market] = event
+        self.head = event["seq"]
+
+    def compact(self):
+        """Rewrite the events file with only the market states and the in-memory horizon."""
+        retained = {event["seq"]: event for event in self.state.values()}
+        retained.update((event["seq"], event) for event in self.events)
+        if self._file_lines <= len(retained):
+            return
+        
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                for seq in sorted(retained):
+                    f.write(json.dumps(retained[seq]) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to compact signal events: {e}")
+            return
+        logger.info(f"Compacted signal events from {self._file_lines} to {len(retained)} lines")
+        self._file_lines = len(retained)
+
+    def last_signal(self, symbol, interval):
+        event = self.state.get((symbol, interval))
+        return event["signal"] if event else None
+
+    def record(self, symbol, interval, signal):
+        """
+        Record a market's current signal.
+        
+        Returns:
+            dict: The appended event if the signal changed
+            None: If the market already has this signal
+        """
+        if self.last_signal(symbol, interval) == signal:
+            return None
+        
+        event = {
+            "seq": self.head + 1,
+            "symbol": symbol,
+            "interval": interval,
+            "signal": signal,
+            "time": time.time()
+        }
+        self._apply(event)
+        line = json.dumps(event) + "\n"
+        try:
+            with open(self.path, "a+b") as f:
+                # Start on a fresh line if the previous write was torn
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = "\n" + line
+                f.write(line.encode())
+            self._file_lines += 1
+        except OSError as e:
+            logger.error(f"Failed to persist signal event #{event['seq']}: {e}")
+        
+        if self._file_lines > 2 * self.events.maxlen:
+            self.compact()
+        
+        logger.info(f"Signal for {symbol} {interval} changed to {signal} (event #{event['seq']})")
+        return event
+
+    def pending(self, chat_id, markets):
+        """
+        Get events a chat has not seen yet for the markets it watches.
+        
+        Chats without a cursor start at the current head, so new users do not
+        receive history. When several events for one market are pending (e.g.
+        after a restart) only the latest is returned. Markets queued with
+        subscribe() also return their current state, even if the chat's cursor
+        is already past it.
+        
+        Args:
+            chat_id (int): Telegram chat ID
+            markets (set): {(symbol, interval)} watched by the chat
+            
+        Returns:
+            list: Events ordered by seq
+        """
+        self.track(chat_id)
+        cursor = self.cursors[chat_id]
+        
+        latest = {}
+        for event in reversed(self.events):
+            if event["seq"] <= cursor:
+                break
+            market = (event["symbol"], event["interval"])
+            if market in markets and market not in latest:
+                latest[market] = event
+        
+        replays = self.replays.get(chat_id)
+        if replays:
+            replays &= markets
+            for market in replays:
+                if market not in latest and market in self.state:
+                    latest[market] = self.state[market]
+        return sorted(latest.values(), key=lambda event: event["seq"])
+
+    def subscribe(self, chat_id, markets):
+        """Queue the current state of markets a chat has just started watching."""
+        self.replays.setdefault(chat_id, set()).update(markets)
+
+    def acknowledge(self, chat_id, events):
+        """Mark events from pending() as delivered, clearing their queued replays."""
+        replays = self.replays.get(chat_id)
+        if replays:
+            replays.difference_update((event["symbol"], event["interval"]) for event in events)
+
+    def track(self, chat_id):
+        """Start a cursor at the current head for a chat seen for the first time."""
+        if chat_id not in self.cursors:
+            self.advance(chat_id, self.head)
+
+    def advance(self, chat_id, seq):
+        """Move a chat's cursor forward to seq."""
+        if seq > self.cursors.get(chat_id, -1):
+            self.cursors[chat_id] = seq
+            self._cursors_dirty = True
+
+    def save_cursors(self):
+        """Snapshot chat cursors to disk if any moved."""
+        if not self._cursors_dirty:
+            return
+        
+        tmp_path = self.cursors_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.cursors, f)
+            os.replace(tmp_path, self.cursors_path)
+            self._cursors_dirty = False
+        except OSError as e:
+            logger.error(f"Failed to save chat cursors: {e}")
+
+signal_log = SignalLog()
@@ -1,7 +1,12 @@
 import logging
 import pandas as pd
 import numpy as np
-from config import EMA_SHORT, EMA_LONG, RSI_PERIOD, MIN_CANDLES
+from collections import OrderedDict
+from config import (
+    EMA_SHORT, EMA_LONG, RSI_PERIOD, MACD_FAST, MACD_SLOW, MACD_SIGNAL, MIN_CANDLES,
+    INDICATOR_CACHE_MAX_MARKETS, DIGEST_MAX_CHARS, DIGEST_MAX_EVENTS
+)
+from bot.profiling import span
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +23,10 @@ def calculate_ema(prices, period):
 
 def calculate_rsi(prices, period=14):
     """Calculate Relative Strength Index"""
-    delta = prices.diff()
+    return _rsi_from_delta(prices.diff(), period)
+
+def _rsi_from_delta(delta, period=14):
+    """Calculate RSI from precomputed price changes"""
     gains = delta.where(delta > 0, 0)
     losses = -delta.where(delta < 0, 0)
     
@@ -41,7 +49,130 @@ def calculate_macd(prices, fast=12, slow=26, signal=9):
     
     return macd_line, signal_line, histogram
 
-def check_signal(df):
+# -------------------------------------------------------------------------
+# Indicator dependency graph
+# -------------------------------------------------------------------------
+# Registered indicators: {name: (func, inputs, params)}
+# func is called with the input series (in order) plus params as keywords.
+# Any OHLCV column name ("close", "volume", ...) is an implicit source node.
+INDICATORS = {}
+
+# Memoized results: {(symbol, interval): (bar_key, {name: pd.Series})}
+# Only the latest bar of each market is kept, and only for the
+# INDICATOR_CACHE_MAX_MARKETS most recently evaluated markets.
+_indicator_cache = OrderedDict()
+
+def register_indicator(name, func, inputs=("close",), **params):
+    """
+    Register an indicator node in the dependency graph.
+    
+    Args:
+        name (str): Unique node name, also used as the cache key
+        func (callable): Computes the node from its input series
+        inputs (tuple): Names of nodes or OHLCV columns this node depends on
+        **params: Extra keyword arguments passed to func
+        
+    Returns:
+        str: Node name
+    """
+    INDICATORS[name] = (func, tuple(inputs), params)
+    return name
+
+def ema_node(period, source="close"):
+    """Get (registering if needed) the EMA node for a period."""
+    name = f"EMA{period}" if source == "close" else f"EMA{period}_{source}"
+    if name not in INDICATORS:
+        register_indicator(name, calculate_ema, (source,), period=period)
+    return name
+
+def rsi_node(period=RSI_PERIOD):
+    """Get (registering if needed) the RSI node for a period."""
+    name = "RSI" if period == RSI_PERIOD else f"RSI{period}"
+    if name not in INDICATORS:
+        register_indicator(name, _rsi_from_delta, ("DELTA",), period=period)
+    return name
+
+def macd_nodes(fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """
+    Get (registering if needed) the MACD nodes for a parameter set.
+    
+    Returns:
+        tuple: (macd_line, signal_line, histogram) node names
+    """
+    suffix = f"{fast}_{slow}_{signal}"
+    macd, macd_signal, histogram = f"MACD_{suffix}", f"MACDs_{suffix}", f"MACDh_{suffix}"
+    if macd not in INDICATORS:
+        register_indicator(macd, lambda f, s: f - s, (ema_node(fast), ema_node(slow)))
+        register_indicator(macd_signal, calculate_ema, (macd,), period=signal)
+        register_indicator(histogram, lambda m, s: m - s, (macd, macd_signal))
+    return macd, macd_signal, histogram
+
+# Default nodes used by check_signal
+register_indicator("DELTA", lambda close: close.diff())
+ema_node(EMA_SHORT)
+ema_node(EMA_LONG)
+rsi_node(RSI_PERIOD)
+macd_nodes()
+
+def _bar_key(df):
+    """
+    Identify the latest bar of a DataFrame.
+    
+    The last close is part of the key because the newest OKX candle is still
+    forming: its indicators must be recomputed whenever its price moves.
+    """
+    last = df.iloc[-1]
+    timestamp = last["timestamp"] if "timestamp" in df.columns else df.index[-1]
+    return timestamp, len(df), last["close"]
+
+def compute_indicators(df, names, symbol=None, interval=None):
+    """
+    Compute indicators through the dependency graph.
+    
+    Shared inputs (e.g. EMA12 used by several MACD variants, or DELTA used by
+    every RSI) are computed once. When symbol and interval are given, results
+    are memoized per (symbol, interval, bar) so strategies and subscribers
+    evaluating the same market reuse one computation.
+    
+    Args:
+        df (pd.DataFrame): OHLCV data
+        names (list): Indicator node names to compute
+        symbol (str, optional): Trading pair symbol, enables memoization
+        interval (str, optional): Timeframe, enables memoization
+        
+    Returns:
+        dict: {name: pd.Series}
+    """
+    results = {}
+    if symbol is not None and interval is not None:
+        bar_key = _bar_key(df)
+        market = (symbol, interval)
+        cached = _indicator_cache.get(market)
+        if cached is None or cached[0] != bar_key:
+            cached = (bar_key, results)
+            _indicator_cache[market] = cached
+        _indicator_cache.move_to_end(market)
+        while len(_indicator_cache) > INDICATOR_CACHE_MAX_MARKETS:
+            _indicator_cache.popitem(last=False)
+        results = cached[1]
+    
+    def resolve(name):
+        if name in results:
+            return results[name]
+        if name in df.columns:
+            return df[name]
+        if name not in INDICATORS:
+            raise KeyError(f"Unknown indicator: {name}")
+        
+        func, inputs, params = INDICATORS[name]
+        with span(name):
+            args = [resolve(dependency) for dependency in inputs]
+            results[name] = func(*args, **params)
+        return results[name]
+    
+    return {name: resolve(name) for name in names}
+
+def check_signal(df, symbol=None, interval=None):
     """
     Analyze price data and generate trading signals based on technical indicators.
     
@@ -51,6 +182,8 @@ def check_signal(df):
     
     Args:
         df (pd.DataFrame): OHLCV data
+        symbol (str, optional): Trading pair symbol, enables indicator memoization
+        interval (str, optional): Timeframe, enables indicator memoization
         
     Returns:
         str: 'LONG', 'SHORT', or None
@@ -61,43 +194,35 @@ def check_signal(df):
     
     try:
         # Calculate technical indicators
-        df = df.copy()
-        
-        # Exponential Moving Averages
-        df["EMA8"] = calculate_ema(df["close"], EMA_SHORT)
-        df["EMA21"] = calculate_ema(df["close"], EMA_LONG)
-        
-        # RSI (Relative Strength Index)
-        df["RSI"] = calculate_rsi(df["close"], RSI_PERIOD)
-        
-        # MACD (Moving Average Convergence Divergence)
-        macd_line, signal_line, histogram = calculate_macd(df["close"])
-        df["MACD_12_26_9"] = macd_line
-        df["MACDs_12_26_9"] = signal_line
-        df["MACDh_12_26_9"] = histogram
+        ema_short = ema_node(EMA_SHORT)
+        ema_long = ema_node(EMA_LONG)
+        rsi_name = rsi_node(RSI_PERIOD)
+        macd_name = macd_nodes()[0]
+        indicators = compute_indicators(
+            df, [ema_short, ema_long, rsi_name, macd_name], symbol, interval
+        )
         
         # Get current and previous values
-        current = df.iloc[-1]
-        previous = df.iloc[-2]
+        current = {name: series.iloc[-1] for name, series in indicators.items()}
+        previous = {name: series.iloc[-2] for name, series in indicators.items()}
         
         # Check for missing values
-        required_cols = ["EMA8", "EMA21", "RSI", "MACD_12_26_9"]
-        if any(pd.isna(current[col]) or pd.isna(previous[col]) for col in required_cols):
+        if any(pd.isna(current[name]) or pd.isna(previous[name]) for name in indicators):
             logger.warning("Missing indicator values, skipping signal check")
             return None
         
         # Detect EMA crossovers
-        ema8_current = current["EMA8"]
-        ema8_previous = previous["EMA8"]
-        ema21_current = current["EMA21"]
-        ema21_previous = previous["EMA21"]
+        ema8_current = current[ema_short]
+        ema8_previous = previous[ema_short]
+        ema21_current = current[ema_long]
+        ema21_previous = previous[ema_long]
         
         cross_up = (ema8_previous <= ema21_previous) and (ema8_current > ema21_current)
         cross_down = (ema8_previous >= ema21_previous) and (ema8_current < ema21_current)
         
         # Get indicator values
-        rsi = current["RSI"]
-        macd_value = current["MACD_12_26_9"]
+        rsi = current[rsi_name]
+        macd_value = current[macd_name]
         
         # Generate signals
         if cross_up and rsi > 50 and macd_value > 0:
@@ -148,3 +273,46 @@ def format_signal_message(symbol, interval, signal, current_data=None):
         message += f"\n\n💰 Текущая цена: ${price:.6f}"
     
     return message
+
+def _telegram_len(text):
+    """Message length as Telegram counts it (UTF-16 code units, emoji count as 2)"""
+    return len(text.encode("utf-16-le")) // 2
+
+_DIGEST_SEPARATOR = "\n\n➖➖➖\n\n"
+_DIGEST_HEADER = "🔔 Новые сигналы: {}\n\n"
+
+def chunk_digest_bodies(bodies, max_chars=DIGEST_MAX_CHARS, max_events=DIGEST_MAX_EVENTS):
+    """
+    Group pre-rendered signal messages into digest-sized chunks.
+    
+    Args:
+        bodies (list): Messages from format_signal_message, in delivery order
+        max_chars (int): Maximum length of one digest
+        max_events (int): Maximum number of signals in one digest
+        
+    Returns:
+        list: Lists of bodies, one per digest, in delivery order
+    """
+    # Leave room for the header of a multi-signal digest
+    limit = max_chars - _telegram_len(_DIGEST_HEADER.format(max_events))
+    chunks = []
+    current = []
+    length = 0
+    
+    for body in bodies:
+        added = _telegram_len(body) + (_telegram_len(_DIGEST_SEPARATOR) if current else 0)
+        if current and (len(current) >= max_events or length + added > limit):
+            chunks.append(current)
+            current, length = [], 0
+            added = _telegram_len(body)
+        current.append(body)
+        length += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+def render_digest(chunk):
+    """Render one chunk from chunk_digest_bodies; a single signal is sent as-is."""
+    if len(chunk) == 1:
+        return chunk[0]
+    return _DIGEST_HEADER.format(len(chunk)) + _DIGEST_SEPARATOR.join(chunk)
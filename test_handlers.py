@@ -0,0 +1,54 @@
+"""
+Tests for signal digest delivery
+"""
+import asyncio
+from telegram.error import BadRequest, ChatMigrated, NetworkError, RetryAfter, TimedOut
+from bot.handlers import send_digest
+from bot.signals import format_signal_message
+
+class FakeBot:
+    """Records sent messages and raises the queued errors in order"""
+    
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.sent = []
+    
+    async def send_message(self, chat_id, text):
+        error = self.errors.pop(0) if self.errors else None
+        if error:
+            raise error
+        self.sent.append(text)
+
+class FakeApp:
+    def __init__(self, errors=()):
+        self.bot = FakeBot(errors)
+
+def make_bodies(count):
+    # 25 bodies make two digests: 20 + 5 signals
+    return [format_signal_message(f"C{i}-USDT", "1m", "LONG") for i in range(count)]
+
+def test_all_digests_delivered():
+    """Every signal is reported as delivered"""
+    app = FakeApp()
+    assert asyncio.run(send_digest(app, 1, make_bodies(25))) == 25
+    assert len(app.bot.sent) == 2
+
+def test_retry_after_and_network_errors_defer_the_rest():
+    """Flood limits and network errors stop sending so the rest is retried"""
+    for error in [RetryAfter(5), NetworkError("connection reset")]:
+        app = FakeApp([None, error])
+        assert asyncio.run(send_digest(app, 1, make_bodies(25))) == 20
+        assert len(app.bot.sent) == 1
+
+def test_timeout_counts_as_delivered():
+    """A timed-out digest is not sent again"""
+    app = FakeApp([TimedOut()])
+    assert asyncio.run(send_digest(app, 1, make_bodies(25))) == 25
+    assert len(app.bot.sent) == 1
+
+def test_permanent_errors_skip_the_digest():
+    """Errors that cannot succeed on retry skip that digest and keep sending"""
+    for error in [BadRequest("chat not found"), ChatMigrated(42)]:
+        app = FakeApp([error])
+        assert asyncio.run(send_digest(app, 1, make_bodies(25))) == 25
+        assert len(app.bot.sent) == 1
@@ -0,0 +1,82 @@
+"""
+Tests for tick tracing and profile dumps
+"""
+import time
+from collections import Counter
+from bot import profiling
+from bot.profiling import TickTrace, SlowTickBuffer, tick_trace, span
+
+def make_trace(tick_id, duration):
+    trace = TickTrace(tick_id)
+    trace.duration = duration
+    return trace
+
+def test_child_span_time_not_counted_in_parent():
+    """Spans record self time, so a child's time is not repeated in its parent"""
+    trace = TickTrace(1)
+    trace.enter("tick")
+    trace.enter("fetch")
+    time.sleep(0.02)
+    trace.exit()
+    total = trace.exit()
+    
+    assert trace.spans["tick;fetch"] >= 0.02
+    assert trace.spans["tick"] < 0.01
+    assert abs(sum(trace.spans.values()) - total) < 1e-6
+
+def test_span_outside_tick_is_noop():
+    """span() records nothing when no tick is being traced"""
+    with span("fetch"):
+        pass
+    
+    with tick_trace() as trace:
+        with span("fetch"):
+            pass
+    assert set(trace.spans) == {"tick", "tick;fetch"}
+
+def test_slow_tick_buffer_keeps_slowest_of_window():
+    """Only the N slowest of the most recent ticks are reported"""
+    buffer = SlowTickBuffer(size=2, window=4)
+    for tick_id, duration in enumerate([9.0, 1.0, 3.0, 2.0, 4.0, 0.5], 1):
+        buffer.add(make_trace(tick_id, duration))
+    
+    # The 9s tick has aged out of the window
+    assert [trace.tick_id for trace in buffer.slowest()] == [5, 3]
+
+def test_dump_slow_ticks_format(tmp_path, monkeypatch):
+    """Slow ticks are written as collapsed stacks with microsecond values"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "slow_ticks", SlowTickBuffer(size=5, window=5))
+    trace = make_trace(7, 0.25)
+    trace.spans.update({"tick": 0.05, "tick;fetch;http": 0.2})
+    profiling.slow_ticks.add(trace)
+    
+    path = profiling.dump_slow_ticks()
+    assert path.startswith(str(tmp_path))
+    with open(path) as f:
+        lines = f.read().splitlines()
+    root = f"tick#7 {trace.started_at:%H:%M:%S} 0.250s"
+    assert lines == [f"{root};tick 50000", f"{root};tick;fetch;http 200000"]
+
+def test_dump_slow_ticks_empty(tmp_path, monkeypatch):
+    """Nothing is written before any tick has been recorded"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "slow_ticks", SlowTickBuffer())
+    assert profiling.dump_slow_ticks() is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_dump_samples_format(tmp_path, monkeypatch):
+    """Samples are written as collapsed stacks with counts, most common first"""
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling.sampler, "samples", Counter({"a:main;b:run": 2, "a:main": 5}))
+    
+    with open(profiling.dump_samples()) as f:
+        assert f.read().splitlines() == ["a:main 5", "a:main;b:run 2"]
+
+def test_dump_failure_is_logged_not_raised(tmp_path, monkeypatch):
+    """An unwritable PROFILE_DIR makes dumps return None"""
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(blocker / "profiles"))
+    monkeypatch.setattr(profiling.sampler, "samples", Counter({"a:main": 1}))
+    assert profiling.dump_samples() is None
@@ -0,0 +1,50 @@
+"""
+Tests for priority scheduling of markets
+"""
+from bot.scheduler import MarketScheduler, interval_seconds
+
+def test_interval_seconds():
+    """OKX bar sizes convert to seconds"""
+    assert interval_seconds("1m") == 60
+    assert interval_seconds("15m") == 900
+    assert interval_seconds("1H") == 3600
+
+def test_plan_groups_subscribers_by_market():
+    """Chats watching the same market share one unit of work"""
+    settings = {
+        1: {"coins": ["BTC-USDT", "ETH-USDT"], "interval": "15m"},
+        2: {"coins": ["BTC-USDT"], "interval": "15m"},
+        3: {"coins": ["BTC-USDT"], "interval": "5m"},
+    }
+    work = {(item.symbol, item.interval): item.chat_ids for item in MarketScheduler().plan(settings, now=0)}
+    assert work == {
+        ("BTC-USDT", "15m"): [1, 2],
+        ("ETH-USDT", "15m"): [1],
+        ("BTC-USDT", "5m"): [3],
+    }
+
+def test_plan_orders_by_subscribers():
+    """Most-watched markets come first"""
+    settings = {chat_id: {"coins": ["BTC-USDT"], "interval": "15m"} for chat_id in range(100)}
+    settings[100] = {"coins": ["OBSCURE-USDT", "BTC-USDT"], "interval": "15m"}
+    work = MarketScheduler().plan(settings, now=1000)
+    assert [item.symbol for item in work] == ["BTC-USDT", "OBSCURE-USDT"]
+
+def test_deferred_market_rises_with_staleness():
+    """A market evaluated long ago overtakes a fresh, more popular one"""
+    settings = {chat_id: {"coins": ["BTC-USDT"], "interval": "1m"} for chat_id in range(4)}
+    settings[4] = {"coins": ["OBSCURE-USDT"], "interval": "1m"}
+    scheduler = MarketScheduler()
+    scheduler.mark_evaluated("BTC-USDT", "1m", now=6000)
+    scheduler.mark_evaluated("OBSCURE-USDT", "1m", now=6000)
+    assert scheduler.plan(settings, now=6030)[0].symbol == "BTC-USDT"
+    
+    scheduler.mark_evaluated("BTC-USDT", "1m", now=6290)
+    assert scheduler.plan(settings, now=6300)[0].symbol == "OBSCURE-USDT"
+
+def test_plan_forgets_unwatched_markets():
+    """Evaluation history is dropped for markets nobody watches"""
+    scheduler = MarketScheduler()
+    scheduler.mark_evaluated("BTC-USDT", "15m", now=0)
+    scheduler.plan({1: {"coins": ["ETH-USDT"], "interval": "15m"}}, now=10)
+    assert scheduler.last_evaluated == {}
@@ -0,0 +1,152 @@
+"""
+Tests for per-market signal state and chat cursors
+"""
+import json
+from bot.signal_log import SignalLog
+
+def make_log(tmp_path, max_events=100):
+    return SignalLog(
+        str(tmp_path / "events.jsonl"), str(tmp_path / "cursors.json"), max_events
+    )
+
+def test_record_dedups_per_market(tmp_path):
+    """Only signal changes are appended, once per market"""
+    log = make_log(tmp_path)
+    assert log.record("BTC-USDT", "15m", "LONG")["seq"] == 1
+    assert log.record("BTC-USDT", "15m", "LONG") is None
+    assert log.record("BTC-USDT", "5m", "LONG")["seq"] == 2
+    assert log.record("BTC-USDT", "15m", "SHORT")["seq"] == 3
+    assert log.last_signal("BTC-USDT", "15m") == "SHORT"
+
+def test_new_chat_starts_at_head(tmp_path):
+    """Chats seen for the first time do not receive history"""
+    log = make_log(tmp_path)
+    log.record("BTC-USDT", "15m", "LONG")
+    assert log.pending(1, {("BTC-USDT", "15m")}) == []
+    
+    log.record("BTC-USDT", "15m", "SHORT")
+    assert [event["signal"] for event in log.pending(1, {("BTC-USDT", "15m")})] == ["SHORT"]
+
+def test_pending_filters_markets_and_keeps_latest(tmp_path):
+    """Pending events cover only watched markets, latest event per market"""
+    log = make_log(tmp_path)
+    log.track(1)
+    log.record("BTC-USDT", "15m", "LONG")
+    log.record("ETH-USDT", "15m", "LONG")
+    log.record("BTC-USDT", "15m", "SHORT")
+    log.record("SOL-USDT", "15m", "LONG")
+    
+    pending = log.pending(1, {("BTC-USDT", "15m"), ("ETH-USDT", "15m")})
+    assert [(event["symbol"], event["signal"]) for event in pending] == [
+        ("ETH-USDT", "LONG"), ("BTC-USDT", "SHORT")
+    ]
+
+def test_cursor_replay_after_restart(tmp_path):
+    """A restarted log delivers events a chat missed while offline"""
+    log = make_log(tmp_path)
+    log.track(1)
+    log.record("BTC-USDT", "15m", "LONG")
+    log.advance(1, log.head)
+    log.save_cursors()
+    log.record("BTC-USDT", "15m", "SHORT")
+    
+    restarted = make_log(tmp_path)
+    restarted.load()
+    assert restarted.head == 2
+    assert [event["seq"] for event in restarted.pending(1, {("BTC-USDT", "15m")})] == [2]
+
+def test_load_after_torn_write(tmp_path):
+    """A partially written line is skipped and later events stay readable"""
+    log = make_log(tmp_path)
+    log.record("BTC-USDT", "15m", "LONG")
+    with open(log.path, "a") as f:
+        f.write('{"seq": 2, "sym')
+    
+    restarted = make_log(tmp_path)
+    restarted.load()
+    assert restarted.head == 1
+    
+    with open(restarted.path, "a") as f:
+        f.write('{"seq": 2, "sym')
+    restarted.record("ETH-USDT", "15m", "SHORT")
+    
+    reloaded = make_log(tmp_path)
+    reloaded.load()
+    assert reloaded.head == 2
+    assert reloaded.last_signal("ETH-USDT", "15m") == "SHORT"
+    with open(reloaded.path) as f:
+        assert all(json.loads(line) for line in f)
+
+def test_cursors_clamped_when_events_file_lost(tmp_path):
+    """Cursors past the head are clamped so new events still reach chats"""
+    log = make_log(tmp_path)
+    log.track(1)
+    for signal in ["LONG", "SHORT", "LONG"]:
+        log.record("BTC-USDT", "15m", signal)
+    log.advance(1, log.head)
+    log.save_cursors()
+    (tmp_path / "events.jsonl").unlink()
+    
+    restarted = make_log(tmp_path)
+    restarted.load()
+    assert restarted.cursors == {1: 0}
+    restarted.record("BTC-USDT", "15m", "SHORT")
+    assert len(restarted.pending(1, {("BTC-USDT", "15m")})) == 1
+
+def test_events_file_is_compacted(tmp_path):
+    """The events file stays bounded by market states plus the horizon"""
+    log = make_log(tmp_path, max_events=5)
+    for i in range(50):
+        log.record("BTC-USDT", "1m", "LONG" if i % 2 else "SHORT")
+    log.record("ETH-USDT", "1m", "LONG")
+    with open(log.path) as f:
+        assert len(f.readlines()) <= 10
+    
+    for i in range(5):
+        log.record("SOL-USDT", "1m", "LONG" if i % 2 else "SHORT")
+    restarted = make_log(tmp_path, max_events=5)
+    restarted.load()
+    assert restarted.head == 56
+    assert restarted.last_signal("ETH-USDT", "1m") == "LONG"
+    # Horizon (seq 52-56) plus the older BTC and ETH states (seq 50, 51)
+    with open(restarted.path) as f:
+        assert [json.loads(line)["seq"] for line in f] == [50, 51, 52, 53, 54, 55, 56]
+
+def test_subscribe_replays_current_state(tmp_path):
+    """A chat that starts watching a market gets its current signal once"""
+    log = make_log(tmp_path)
+    log.track(1)
+    log.record("BTC-USDT", "15m", "LONG")
+    log.record("ETH-USDT", "15m", "SHORT")
+    log.advance(1, log.head)
+    
+    log.subscribe(1, {("BTC-USDT", "15m"), ("SOL-USDT", "15m")})
+    pending = log.pending(1, {("BTC-USDT", "15m"), ("SOL-USDT", "15m")})
+    assert [(event["symbol"], event["signal"]) for event in pending] == [("BTC-USDT", "LONG")]
+    
+    log.acknowledge(1, pending)
+    assert log.pending(1, {("BTC-USDT", "15m")}) == []
+
+def test_unacknowledged_replay_is_retried(tmp_path):
+    """Replays stay queued until delivered, and newer events take precedence"""
+    log = make_log(tmp_path)
+    log.track(1)
+    log.record("BTC-USDT", "15m", "LONG")
+    log.advance(1, log.head)
+    log.subscribe(1, {("BTC-USDT", "15m")})
+    
+    assert len(log.pending(1, {("BTC-USDT", "15m")})) == 1
+    log.record("BTC-USDT", "15m", "SHORT")
+    pending = log.pending(1, {("BTC-USDT", "15m")})
+    assert [event["signal"] for event in pending] == ["SHORT"]
+
+def test_replay_dropped_when_market_unwatched(tmp_path):
+    """Removing a market before delivery cancels its replay"""
+    log = make_log(tmp_path)
+    log.track(1)
+    log.record("BTC-USDT", "15m", "LONG")
+    log.advance(1, log.head)
+    log.subscribe(1, {("BTC-USDT", "15m")})
+    
+    assert log.pending(1, set()) == []
+    assert log.pending(1, {("BTC-USDT", "15m")}) == []
@@ -0,0 +1,81 @@
+"""
+Tests for the indicator graph and signal digests
+"""
+import numpy as np
+import pandas as pd
+from bot import signals
+from bot.signals import (
+    calculate_ema, calculate_rsi, calculate_macd, compute_indicators, register_indicator,
+    chunk_digest_bodies, render_digest, format_signal_message
+)
+
+def make_df(periods=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-01-01", periods=periods, freq="15min"),
+        "close": np.cumsum(rng.standard_normal(periods)) + 100,
+    })
+
+def test_graph_matches_direct_indicators():
+    """Graph nodes produce the same series as the standalone functions"""
+    df = make_df()
+    result = compute_indicators(df, ["EMA8", "EMA21", "RSI", "MACD_12_26_9"])
+    assert np.allclose(result["EMA8"], calculate_ema(df["close"], 8))
+    assert np.allclose(result["EMA21"], calculate_ema(df["close"], 21))
+    assert np.allclose(result["RSI"], calculate_rsi(df["close"], 14), equal_nan=True)
+    assert np.allclose(result["MACD_12_26_9"], calculate_macd(df["close"])[0])
+
+def test_shared_inputs_computed_once_and_memoized(monkeypatch):
+    """Shared nodes run once per call and once per (symbol, interval, bar)"""
+    monkeypatch.setattr(signals, "INDICATORS", dict(signals.INDICATORS))
+    monkeypatch.setattr(signals, "_indicator_cache", signals.OrderedDict())
+    calls = []
+    
+    def counted(close):
+        calls.append(1)
+        return close * 2
+    
+    register_indicator("TEST_DOUBLE", counted)
+    register_indicator("TEST_A", lambda x: x + 1, ("TEST_DOUBLE",))
+    register_indicator("TEST_B", lambda x: x - 1, ("TEST_DOUBLE",))
+    
+    df = make_df()
+    compute_indicators(df, ["TEST_A", "TEST_B"], "TEST-USDT", "15m")
+    compute_indicators(df.copy(), ["TEST_A"], "TEST-USDT", "15m")
+    assert len(calls) == 1
+    
+    # The newest candle is still forming: a price move invalidates the cache
+    moved = df.copy()
+    moved.loc[moved.index[-1], "close"] += 1
+    compute_indicators(moved, ["TEST_A"], "TEST-USDT", "15m")
+    assert len(calls) == 2
+
+def test_indicator_cache_is_bounded(monkeypatch):
+    """Least recently evaluated markets are evicted"""
+    monkeypatch.setattr(signals, "INDICATOR_CACHE_MAX_MARKETS", 3)
+    monkeypatch.setattr(signals, "_indicator_cache", signals.OrderedDict())
+    df = make_df()
+    for symbol in ["A", "B", "C", "D"]:
+        compute_indicators(df, ["DELTA"], symbol, "15m")
+    assert list(signals._indicator_cache) == [("B", "15m"), ("C", "15m"), ("D", "15m")]
+
+def test_single_signal_digest_is_unchanged():
+    """A lone signal is sent as its own message"""
+    body = format_signal_message("BTC-USDT", "15m", "LONG")
+    assert chunk_digest_bodies([body]) == [[body]]
+    assert render_digest([body]) == body
+
+def test_digests_split_by_event_count():
+    """Digests never hold more than max_events signals"""
+    bodies = [format_signal_message(f"C{i}-USDT", "1m", "LONG") for i in range(5)]
+    chunks = chunk_digest_bodies(bodies, max_events=2)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert render_digest(chunks[0]).startswith("🔔 Новые сигналы: 2")
+
+def test_digests_respect_telegram_length():
+    """Digests stay within max_chars as Telegram counts them"""
+    bodies = [format_signal_message(f"C{i}-USDT", "1m", "SHORT") for i in range(40)]
+    digests = [render_digest(chunk) for chunk in chunk_digest_bodies(bodies, max_chars=1000, max_events=40)]
+    assert len(digests) > 1
+    assert all(len(digest.encode("utf-16-le")) // 2 <= 1000 for digest in digests)
+    assert sum(digest.count("Монета") for digest in digests) == 40